@@ -1,8 +1,10 @@
 import socket
 import threading
 import json
+import hashlib
 import random
 import time
+import itertools
 from concurrent.futures import ThreadPoolExecutor
 
 # Server connection config
@@ -20,7 +22,7 @@ MAX_ENTRY_DELAY = 20
 
 # Vehicle generation config
 VEHICLE_TYPES = ["CAR", "SUV", "TRUCK", "VAN", "BUS"]
-VEHICLE_MAX_DIGITS = 3  # 000 - 999
+VEHICLE_MAX_DIGITS = 3  # 001 - 999, minimum 1, raise for large load runs
 MAX_VEHICLES = 30      # Vehicles to generate
 
 # Control variables
@@ -28,13 +30,40 @@ running = True
 startup_complete = False  # for booth connetion readiness
 startup_barrier = None    # thread barrier for synced startup
 
-# vehicle tracking for unique values
-generated_vehicles = set()
-vehicle_lock = threading.Lock()
+if VEHICLE_MAX_DIGITS < 1:
+    raise ValueError(f"VEHICLE_MAX_DIGITS must be at least 1, got {VEHICLE_MAX_DIGITS}")
 
-# Counter for total vehicles
-vehicles_generated = 0
-vehicles_generated_lock = threading.Lock()
+# vehicle id space, every type prefix gets numbers 1 .. 10^digits - 1
+VEHICLE_NUMBERS_PER_TYPE = 10**VEHICLE_MAX_DIGITS - 1
+VEHICLE_ID_SPACE = len(VEHICLE_TYPES) * VEHICLE_NUMBERS_PER_TYPE
+
+# next() on itertools.count is atomic, so booth threads draw ids without a lock
+vehicle_counter = itertools.count()
+
+# feistel network over the smallest even bit width covering the id space
+VEHICLE_FEISTEL_ROUNDS = 4
+vehicle_half_bits = max(1, ((VEHICLE_ID_SPACE - 1).bit_length() + 1) // 2)
+vehicle_half_mask = (1 << vehicle_half_bits) - 1
+vehicle_half_bytes = (vehicle_half_bits + 7) // 8
+vehicle_round_keys = [random.getrandbits(128).to_bytes(16, "big") for _ in range(VEHICLE_FEISTEL_ROUNDS)]
+
+def vehicle_round_function(right, key):
+    # keyed hash with a digest as wide as the half, so every bit gets mixed
+    digest = hashlib.blake2b(right.to_bytes(vehicle_half_bytes, "big"),
+                             key=key, digest_size=vehicle_half_bytes).digest()
+    return int.from_bytes(digest, "big") & vehicle_half_mask
+
+def permute_vehicle_index(index):
+    # cycle-walk until the result lands back inside the id space, the
+    # feistel domain is under 4x the space so this takes few rounds
+    while True:
+        left = index >> vehicle_half_bits
+        right = index & vehicle_half_mask
+        for key in vehicle_round_keys:
+            left, right = right, left ^ vehicle_round_function(right, key)
+        index = (left << vehicle_half_bits) | right
+        if index < VEHICLE_ID_SPACE:
+            return index
 
 # assign booth count for whether its a plaza point or regular point
 def get_booth_count(point):
@@ -44,26 +73,22 @@ def get_booth_count(point):
         return BOOTHS_PER_REGULAR
 
 def generate_vehicle_id():
-    global vehicles_generated
-    
-    with vehicle_lock:
-        if vehicles_generated >= MAX_VEHICLES:
-            return None
-        
-        vehicle_type = random.choice(VEHICLE_TYPES)
-        vehicle_number = str(random.randint(1, 10**VEHICLE_MAX_DIGITS - 1)).zfill(VEHICLE_MAX_DIGITS)
-        vehicle_id = f"{vehicle_type}{vehicle_number}"
-        
-        # incase it created a duplicate vehicle id
-        while vehicle_id in generated_vehicles:
-            vehicle_number = str(random.randint(1, 10**VEHICLE_MAX_DIGITS - 1)).zfill(VEHICLE_MAX_DIGITS)
-            vehicle_id = f"{vehicle_type}{vehicle_number}"
-        
-        # add to list and counter
-        generated_vehicles.add(vehicle_id)
-        vehicles_generated += 1
-            
-        return vehicle_id
+    index = next(vehicle_counter)
+    if index >= MAX_VEHICLES:
+        return None
+    if index >= VEHICLE_ID_SPACE:
+        # the counter hands this index to exactly one caller, so it reports once
+        if index == VEHICLE_ID_SPACE:
+            print(f"[ERROR] Vehicle ID space exhausted after {VEHICLE_ID_SPACE} ids, "
+                  f"increase VEHICLE_MAX_DIGITS")
+        return None
+
+    # each index maps to exactly one slot, so ids never collide
+    slot = permute_vehicle_index(index)
+    vehicle_type = VEHICLE_TYPES[slot // VEHICLE_NUMBERS_PER_TYPE]
+    vehicle_number = str(slot % VEHICLE_NUMBERS_PER_TYPE + 1).zfill(VEHICLE_MAX_DIGITS)
+
+    return f"{vehicle_type}{vehicle_number}"
 
 def booth_worker(point, booth_id, is_entry):
     global startup_complete
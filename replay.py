@@ -0,0 +1,179 @@
+import socket
+import threading
+import json
+import time
+import argparse
+from collections import defaultdict, Counter
+from concurrent.futures import ThreadPoolExecutor
+
+# Replay target config
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8081
+
+CAPTURE_FILE = "traffic_capture.jsonl"
+MAX_WORKERS = 64  # concurrent connections in fast mode
+
+def load_capture(path):
+    # group captured records by connection, keeping arrival order
+    connections = defaultdict(list)
+    start_time = None
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if start_time is None or record["t"] < start_time:
+                start_time = record["t"]
+            connections[record["conn"]].append(record)
+    return connections, start_time or 0.0
+
+def replay_connection(host, port, records, capture_start, replay_start, fast, results, results_lock):
+    latencies = []
+    statuses = Counter()
+    registrations = Counter()
+    sock = None
+
+    try:
+        for record in records:
+            if not fast:
+                # keep original spacing relative to the start of the capture
+                wait = (record["t"] - capture_start) - (time.perf_counter() - replay_start)
+                if wait > 0:
+                    time.sleep(wait)
+
+            if record["kind"] == "register":
+                if sock:
+                    sock.close()
+                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                sock.connect((host, port))
+            elif sock is None:
+                # capture started mid-connection, nothing to register with
+                statuses["Skipped"] += 1
+                continue
+
+            sent_at = time.perf_counter()
+            sock.send(json.dumps(record["data"]).encode())
+            data = sock.recv(1024).decode()
+            elapsed = time.perf_counter() - sent_at
+
+            if not data:
+                if record["kind"] == "request":
+                    statuses["Disconnected"] += 1
+                else:
+                    registrations["Disconnected"] += 1
+                break
+
+            response = json.loads(data)
+            if record["kind"] == "request":
+                statuses[response.get("status", "Unknown")] += 1
+                latencies.append(elapsed)
+            else:
+                registrations[response.get("status", "Unknown")] += 1
+
+    except Exception as e:
+        print(f"[ERROR] Replay of connection {records[0]['conn']} failed: {e}")
+        statuses["Error"] += 1
+    finally:
+        if sock:
+            sock.close()
+
+    with results_lock:
+        results["latencies"].extend(latencies)
+        results["statuses"].update(statuses)
+        results["registrations"].update(registrations)
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+def run_replay(host, port, connections, capture_start, fast, workers):
+    results = {"latencies": [], "statuses": Counter(), "registrations": Counter()}
+    results_lock = threading.Lock()
+
+    # original speed needs every connection live at once to keep the timing
+    if fast:
+        pool_size = min(workers, len(connections))
+    else:
+        pool_size = len(connections)
+
+    print(f"[REPLAY] {len(connections)} connections against {host}:{port} "
+          f"({'fast' if fast else 'original speed'})")
+
+    replay_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, pool_size)) as executor:
+        for records in connections.values():
+            executor.submit(replay_connection, host, port, records,
+                            capture_start, replay_start, fast, results, results_lock)
+    duration = time.perf_counter() - replay_start
+
+    latencies = sorted(results["latencies"])
+    requests = len(latencies)
+    return {
+        "target": f"{host}:{port}",
+        "requests": requests,
+        "duration": duration,
+        "throughput": requests / duration if duration > 0 else 0.0,
+        "mean_ms": sum(latencies) / requests * 1000 if requests else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "statuses": dict(results["statuses"]),
+        "registrations": dict(results["registrations"])
+    }
+
+def print_report(report):
+    print(f"\n[REPORT] {report['target']}")
+    print(f"  Requests:   {report['requests']} in {report['duration']:.2f}s")
+    print(f"  Throughput: {report['throughput']:.1f} req/s")
+    print(f"  Latency:    mean {report['mean_ms']:.2f}ms, p50 {report['p50_ms']:.2f}ms, "
+          f"p95 {report['p95_ms']:.2f}ms, p99 {report['p99_ms']:.2f}ms")
+    print(f"  Statuses:   {report['statuses']}")
+    print(f"  Registers:  {report['registrations']}")
+
+def print_comparison(baseline, candidate):
+    print(f"\n[COMPARE] {candidate['target']} vs {baseline['target']}")
+    for key, label in [("throughput", "Throughput"), ("mean_ms", "Mean latency"),
+                       ("p50_ms", "p50 latency"), ("p95_ms", "p95 latency"),
+                       ("p99_ms", "p99 latency")]:
+        old = baseline[key]
+        new = candidate[key]
+        change = (new - old) / old * 100 if old else 0.0
+        print(f"  {label:<13} {old:10.2f} -> {new:10.2f}  ({change:+.1f}%)")
+
+def parse_target(value):
+    host, _, port = value.rpartition(":")
+    return host or SERVER_HOST, int(port)
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay captured booth traffic against a toll server")
+    parser.add_argument("capture", nargs="?", default=CAPTURE_FILE,
+                        help="capture file written by server.py --capture (or TOLL_CAPTURE=1)")
+    parser.add_argument("--target", default=f"{SERVER_HOST}:{SERVER_PORT}",
+                        help="server to replay against (host:port)")
+    parser.add_argument("--compare", help="second server build to replay against (host:port)")
+    parser.add_argument("--fast", action="store_true",
+                        help="ignore captured timing and send as fast as possible")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS,
+                        help="concurrent connections in fast mode")
+    args = parser.parse_args()
+
+    connections, capture_start = load_capture(args.capture)
+    if not connections:
+        print(f"[ERROR] No captured traffic in {args.capture}")
+        return
+
+    host, port = parse_target(args.target)
+    baseline = run_replay(host, port, connections, capture_start, args.fast, args.workers)
+    print_report(baseline)
+
+    if args.compare:
+        host, port = parse_target(args.compare)
+        candidate = run_replay(host, port, connections, capture_start, args.fast, args.workers)
+        print_report(candidate)
+        print_comparison(baseline, candidate)
+
+if __name__ == "__main__":
+    main()
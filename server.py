@@ -2,8 +2,11 @@ import socket
 import threading
 import json
 import os
+import queue
 import random
 import time
+import itertools
+import sys
 from datetime import datetime
 
 HOST = '0.0.0.0'
@@ -32,6 +35,174 @@ def log_transaction(log_data):
     with open(LOG_FILE, "a") as f:
         f.write(json.dumps(log_data) + "\n")
 
+# traffic capture for replay.py, off by default
+# enable with TOLL_CAPTURE=1 or "python server.py --capture"
+CAPTURE_TRAFFIC = os.environ.get("TOLL_CAPTURE") == "1"
+CAPTURE_FILE = os.environ.get("TOLL_CAPTURE_FILE", "traffic_capture.jsonl")
+
+capture_queue = queue.Queue()
+capture_thread = None
+connection_counter = itertools.count(1)  # connection identity for captures
+
+def capture_writer():
+    # single writer so booth threads only pay for a queue put
+    with open(CAPTURE_FILE, "a") as f:
+        while True:
+            record = capture_queue.get()
+            if record is None:
+                break  # stop sentinel, closing the file flushes the rest
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+            if capture_queue.empty():
+                f.flush()
+
+def capture_request(conn_id, addr, kind, payload):
+    if not CAPTURE_TRAFFIC:
+        return
+    capture_queue.put({
+        "t": time.time(),
+        "conn": conn_id,
+        "addr": f"{addr[0]}:{addr[1]}",
+        "kind": kind,
+        "data": payload
+    })
+
+def stop_capture():
+    # drain everything queued so far before the process exits
+    if capture_thread is None:
+        return
+    capture_queue.put(None)
+    capture_thread.join()
+    print(f"[CAPTURE] Capture saved to {CAPTURE_FILE}")
+
+# running aggregates, each thread writes only to its own shard so the hot
+# path takes no lock and readers sum the shards for a snapshot
+STATS_WINDOW_BUCKETS = 60  # ring buckets for windowed rates
+STATS_BUCKET_SECONDS = 1
+
+SYSTEM_BOOTH = "SYSTEM"  # stats booth key for forced exits
+
+def new_stats_shard():
+    return {
+        "points": {},  # point -> [entries, exits, fees]
+        "booths": {},  # (point, booth_id, "entry"|"exit") -> [entries, exits, fees]
+        "bucket_time": [-1] * STATS_WINDOW_BUCKETS,
+        "bucket_vehicles": [0] * STATS_WINDOW_BUCKETS,
+        "bucket_fees": [0.0] * STATS_WINDOW_BUCKETS
+    }
+
+# first shard holds the totals of finished connections, the list is replaced
+# rather than mutated so readers always see a consistent set of shards
+stats_shards = [new_stats_shard()]
+stats_shards_lock = threading.Lock()  # only taken when shards are added or retired
+stats_local = threading.local()
+
+def get_stats_shard():
+    global stats_shards
+    
+    shard = getattr(stats_local, "shard", None)
+    if shard is None:
+        shard = new_stats_shard()
+        stats_local.shard = shard
+        with stats_shards_lock:
+            stats_shards = stats_shards + [shard]
+    return shard
+
+def add_stats_totals(totals, source):
+    for key, values in list(source.items()):
+        entries, exits, fees = list(values)
+        merged = totals.setdefault(key, [0, 0, 0.0])
+        merged[0] += entries
+        merged[1] += exits
+        merged[2] += fees
+
+def retire_stats_shard():
+    # fold a finished connection's shard into the retired totals so the
+    # shard list does not grow with every connection ever accepted
+    global stats_shards
+    
+    shard = getattr(stats_local, "shard", None)
+    if shard is None:
+        return
+    stats_local.shard = None
+    
+    with stats_shards_lock:
+        retired = stats_shards[0]
+        merged = new_stats_shard()
+        for key in ("points", "booths"):
+            add_stats_totals(merged[key], retired[key])
+            add_stats_totals(merged[key], shard[key])
+        
+        for index in range(STATS_WINDOW_BUCKETS):
+            retired_time = retired["bucket_time"][index]
+            shard_time = shard["bucket_time"][index]
+            merged["bucket_time"][index] = max(retired_time, shard_time)
+            if retired_time == merged["bucket_time"][index]:
+                merged["bucket_vehicles"][index] += retired["bucket_vehicles"][index]
+                merged["bucket_fees"][index] += retired["bucket_fees"][index]
+            if shard_time == merged["bucket_time"][index]:
+                merged["bucket_vehicles"][index] += shard["bucket_vehicles"][index]
+                merged["bucket_fees"][index] += shard["bucket_fees"][index]
+        
+        stats_shards = [merged] + [s for s in stats_shards[1:] if s is not shard]
+
+def get_stats_bucket(shard):
+    # reuse the ring slot once its time window has passed
+    bucket_time = int(time.time() // STATS_BUCKET_SECONDS)
+    index = bucket_time % STATS_WINDOW_BUCKETS
+    if shard["bucket_time"][index] != bucket_time:
+        shard["bucket_vehicles"][index] = 0
+        shard["bucket_fees"][index] = 0.0
+        shard["bucket_time"][index] = bucket_time
+    return index
+
+def record_entry_stats(point, booth_id):
+    shard = get_stats_shard()
+    shard["points"].setdefault(point, [0, 0, 0.0])[0] += 1
+    shard["booths"].setdefault((point, booth_id, "entry"), [0, 0, 0.0])[0] += 1
+    shard["bucket_vehicles"][get_stats_bucket(shard)] += 1
+
+def record_exit_stats(point, booth_id, toll_fee):
+    shard = get_stats_shard()
+    point_stats = shard["points"].setdefault(point, [0, 0, 0.0])
+    point_stats[1] += 1
+    point_stats[2] += toll_fee
+    if booth_id == SYSTEM_BOOTH:
+        booth_key = SYSTEM_BOOTH
+    else:
+        booth_key = (point, booth_id, "exit")
+    booth_stats = shard["booths"].setdefault(booth_key, [0, 0, 0.0])
+    booth_stats[1] += 1
+    booth_stats[2] += toll_fee
+    shard["bucket_fees"][get_stats_bucket(shard)] += toll_fee
+
+def get_stats_snapshot():
+    points = {}
+    booths = {}
+    window_vehicles = 0
+    window_fees = 0.0
+    oldest_bucket = int(time.time() // STATS_BUCKET_SECONDS) - STATS_WINDOW_BUCKETS
+
+    # copies are single C calls under the GIL, so no writer lock is needed
+    for shard in stats_shards:
+        add_stats_totals(points, shard["points"])
+        add_stats_totals(booths, shard["booths"])
+
+        bucket_times = list(shard["bucket_time"])
+        bucket_vehicles = list(shard["bucket_vehicles"])
+        bucket_fees = list(shard["bucket_fees"])
+        for index, bucket_time in enumerate(bucket_times):
+            if bucket_time > oldest_bucket:
+                window_vehicles += bucket_vehicles[index]
+                window_fees += bucket_fees[index]
+
+    window_minutes = STATS_WINDOW_BUCKETS * STATS_BUCKET_SECONDS / 60
+    return {
+        "points": points,
+        "booths": booths,
+        "vehicles_per_min": window_vehicles / window_minutes,
+        "fees_per_min": window_fees / window_minutes
+    }
+
 def calculate_toll_fee(entry_point, exit_point):
     distance = abs(exit_point - entry_point)
     return distance * REGULAR_TOLL_RATE
@@ -75,6 +246,8 @@ def handle_entry_request(booth_id, point, vehicle_id, booth_key):
             booth_vehicles[booth_key] = set()
         booth_vehicles[booth_key].add(vehicle_id)
     
+    record_entry_stats(point, booth_id)
+    
     # transaction details
     log_data = {
         "action": "Entry",
@@ -143,6 +316,8 @@ def handle_exit_request(booth_id, point):
         completed_vehicles.add(vehicle_id)
         total_fees_collected += toll_fee
     
+    record_exit_stats(point, booth_id, toll_fee)
+    
     log_data = {
         "action": "Exit",
         "vehicle_id": vehicle_id,
@@ -168,6 +343,8 @@ def handle_exit_request(booth_id, point):
     }
 
 def process_remaining_vehicles_from_booth(booth_key):
+    global total_fees_collected
+    
     # Get vehicles that entered from this booth
     vehicles_to_process = []
     with data_lock:
@@ -211,6 +388,8 @@ def process_remaining_vehicles_from_booth(booth_key):
             completed_vehicles.add(vehicle_id)
             total_fees_collected += toll_fee
         
+        record_exit_stats(exit_point, SYSTEM_BOOTH, toll_fee)
+        
         # log the forced exit
         log_data = {
             "action": "Forced Exit",
@@ -228,7 +407,7 @@ def process_remaining_vehicles_from_booth(booth_key):
         print(f"[FORCED EXIT] Vehicle {vehicle_id} forcibly exited at Point {exit_point+1}, "
               f"Toll fee: ${toll_fee:.2f}")#, Travel time: {travel_time:.2f}s")
 
-def handle_booth_connection(conn, addr, booth_id, point, is_entry):
+def handle_booth_connection(conn, addr, conn_id, booth_id, point, is_entry):
     if is_entry:
         booth_type = "Entry"
     else:
@@ -254,6 +433,7 @@ def handle_booth_connection(conn, addr, booth_id, point, is_entry):
                     break  # connection closed
                 
                 request = json.loads(data)
+                capture_request(conn_id, addr, "request", request)
                 action = request.get("action")
                 
                 # process based on action type
@@ -301,8 +481,24 @@ def handle_booth_connection(conn, addr, booth_id, point, is_entry):
             if booth_key in booth_vehicles and not booth_vehicles[booth_key]:
                 del booth_vehicles[booth_key]
                 
+        retire_stats_shard()
+        
         print(f"[DISCONNECTED] {booth_type} Booth {booth_id} at {point_name} disconnected")
 
+def booth_sort_key(item):
+    # booths by point then booth id, forced exits last
+    booth_key = item[0]
+    if booth_key == SYSTEM_BOOTH:
+        return (1, ())
+    return (0, booth_key)
+
+def format_booth_key(booth_key):
+    if booth_key == SYSTEM_BOOTH:
+        # forced exits are not tied to a booth
+        return f"{SYSTEM_BOOTH} (forced exits)"
+    point, booth_id, kind = booth_key
+    return f"P{point+1} B{booth_id} {kind}"
+
 def stats_printer():
     while True:
         with data_lock:
@@ -316,11 +512,28 @@ def stats_printer():
               f"Total: {total_count} vehicles, "
               f"Completed: {completed} vehicles, "
               f"Connected Booths: {booth_count}, "
-              f"Fees Collected: ${fees:.2f}\n")
+              f"Fees Collected: ${fees:.2f}")
+        
+        snapshot = get_stats_snapshot()
+        point_stats = ", ".join(
+            f"P{point+1} in {values[0]} out {values[1]} ${values[2]:.2f}"
+            for point, values in sorted(snapshot["points"].items())
+        )
+        booth_stats = ", ".join(
+            f"{format_booth_key(booth_key)} in {values[0]} out {values[1]} ${values[2]:.2f}"
+            for booth_key, values in sorted(snapshot["booths"].items(), key=booth_sort_key)
+            if values[0] or values[1]
+        )
+        print(f"[STATS] Rate: {snapshot['vehicles_per_min']:.1f} vehicles/min, "
+              f"${snapshot['fees_per_min']:.2f}/min")
+        print(f"[STATS] By point: {point_stats or 'none'}")
+        print(f"[STATS] By booth: {booth_stats or 'none'}\n")
         
         time.sleep(3)
 
 def start_server():
+    global capture_thread
+    
     try:
         server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         # server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
@@ -332,10 +545,18 @@ def start_server():
         stats_thread = threading.Thread(target=stats_printer, daemon=True)
         stats_thread.start()
 
+        if CAPTURE_TRAFFIC:
+            if os.path.exists(CAPTURE_FILE):
+                os.remove(CAPTURE_FILE)
+            capture_thread = threading.Thread(target=capture_writer, daemon=True)
+            capture_thread.start()
+            print(f"[CAPTURE] Recording booth traffic to {CAPTURE_FILE}")
+
         print("[SERVER] Highway toll system ready. Waiting for booth connections...")
         
         while True:
             conn, addr = server.accept()
+            conn_id = next(connection_counter)
             
             try:
                 data = conn.recv(1024).decode()
@@ -345,11 +566,14 @@ def start_server():
                 
                 # parse booth registration
                 register_info = json.loads(data)
+                capture_request(conn_id, addr, "register", register_info)
                 booth_id = register_info.get("booth_id")
                 point = register_info.get("point")
                 is_entry = register_info.get("is_entry", True)
                 
-                if not isinstance(booth_id, int) or not isinstance(point, int):
+                # bool is an int subclass, so JSON true/false must be rejected explicitly
+                if (not isinstance(booth_id, int) or not isinstance(point, int)
+                        or isinstance(booth_id, bool) or isinstance(point, bool)):
                     print(f"[ERROR] Invalid booth registration from {addr}: {register_info}")
                     conn.send(json.dumps({"status": "Failure", "message": "Invalid registration"}).encode())
                     conn.close()
@@ -361,7 +585,7 @@ def start_server():
                 # Start a thread to handle this booth
                 client_thread = threading.Thread(
                     target=handle_booth_connection, 
-                    args=(conn, addr, booth_id, point, is_entry),
+                    args=(conn, addr, conn_id, booth_id, point, is_entry),
                     daemon=True
                 )
                 client_thread.start()
@@ -392,6 +616,9 @@ def start_server():
     finally:
         if 'server' in locals():
             server.close()
+        stop_capture()
 
 if __name__ == "__main__":
+    if "--capture" in sys.argv:
+        CAPTURE_TRAFFIC = True
     start_server()
\ No newline at end of file